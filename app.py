@@ -1,31 +1,93 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
+from flask.json.provider import JSONProvider
+from typing import Any, Optional
 from storage.memory_store import MemoryStore
 from services.contact_service import ContactService
 from controllers.contact_controller import ContactController
+from logging.handlers import QueueHandler, QueueListener
+import atexit
 import logging
+import orjson
+import os
+import queue
+
+
+class _RawQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records untouched.
+    The stock prepare() formats each record on the calling thread; the
+    queue never leaves this process, so formatting is left to the listener.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _configure_logging() -> None:
+    """
+    Configure root logging through a queue.
+    Request threads only enqueue records; a background listener thread
+    formats them and performs the actual stream I/O.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logging.basicConfig(level=logging.INFO, handlers=[_RawQueueHandler(log_queue)])
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+_configure_logging()
 logger = logging.getLogger(__name__)
 
 
-def create_app():
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+    Used by request.get_json() for parsing and by jsonify() for responses.
+    orjson keeps dict insertion order and emits compact output.
+    """
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=kwargs.get('default')).decode()
+    
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # Hand orjson's bytes straight to the response, skipping the str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+
+def create_app(snapshot_path: Optional[str] = None):
     """
     Application factory pattern for creating Flask app.
     
+    Args:
+        snapshot_path: File used to persist contacts across restarts.
+                       Defaults to the ADDRESS_BOOK_SNAPSHOT environment
+                       variable; persistence is disabled when neither is set.
+    
     Returns:
         Flask: Configured Flask application
     """
     app = Flask(__name__)
     
     # Configure Flask
-    app.config['JSON_SORT_KEYS'] = False  # Maintain field order in JSON responses
+    app.json = OrjsonProvider(app)  # Fast JSON parsing and encoding, field order preserved
     
     # Initialize storage layer
-    memory_store = MemoryStore()
+    snapshot_path = snapshot_path or os.environ.get('ADDRESS_BOOK_SNAPSHOT')
+    memory_store = MemoryStore(snapshot=snapshot_path)
+    if snapshot_path:
+        memory_store.start_snapshotter(snapshot_path)
+        atexit.register(memory_store.stop_snapshotter)
+        logger.info("Snapshotting storage to %s", snapshot_path)
     logger.info("Initialized in-memory storage")
     
     # Initialize service layer
@@ -62,6 +124,13 @@ def create_app():
                 "delete": "DELETE /delete",
                 "search": "POST /search",
                 "health": "GET /health"
+            },
+            "response_modes": {
+                "full": "create/update return the full contact objects (default)",
+                "lean": "create/update return only {count, ids} with ?lean=true "
+                        "or 'Prefer: return=minimal'",
+                "partial": "create/update apply valid items and return 207 with "
+                           "per-item results with ?partial=true"
             }
         }), 200
     
@@ -76,7 +145,7 @@ def create_app():
     
     @app.errorhandler(500)
     def internal_error(error):
-        logger.error(f"Internal server error: {error}")
+        logger.error("Internal server error: %s", error)
         return jsonify({"error": "Internal server error"}), 500
     
     logger.info("Flask application created successfully")
@@ -94,6 +163,7 @@ if __name__ == '__main__':
     logger.info("  DELETE /delete  - Delete contacts")
     logger.info("  POST   /search  - Search contacts")
     logger.info("  GET    /health  - Health check")
+    logger.warning("Using the Flask development server; run 'gunicorn -c gunicorn.conf.py' in production")
     
     # Run the application on port 5000
     app.run(
@@ -1,12 +1,71 @@
-from flask import Blueprint, request, jsonify
-from typing import List, Dict, Any
+from flask import Blueprint, Response, request, jsonify
+from typing import Iterator, List, Dict, Any, Tuple
+from models.contact import Contact
 from services.contact_service import ContactService
 import logging
+import orjson
+import uuid
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Contacts encoded per streamed chunk, bounding memory while keeping writes large
+_STREAM_CHUNK_SIZE = 256
+
+
+def _contact_default(obj: Any) -> Dict[str, Any]:
+    """orjson fallback that serializes contacts with the API field order"""
+    if isinstance(obj, Contact):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_response(data: Any, status: int) -> Response:
+    """Build a JSON response encoded with orjson"""
+    body = orjson.dumps(data, default=_contact_default,
+                        option=orjson.OPT_PASSTHROUGH_DATACLASS)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _stream_contacts(contacts: List[Contact]) -> Iterator[bytes]:
+    """Yield a JSON array of contacts, encoding one chunk at a time"""
+    yield b'['
+    for start in range(0, len(contacts), _STREAM_CHUNK_SIZE):
+        if start:
+            yield b','
+        # map() with the unbound method beats orjson's per-object default callback
+        chunk = orjson.dumps(list(map(Contact.to_dict, contacts[start:start + _STREAM_CHUNK_SIZE])))
+        yield chunk[1:-1]  # Strip the chunk's own brackets
+    yield b']'
+
+
+def _contacts_response(contacts: List[Contact], status: int) -> Response:
+    """Build a streamed JSON array response of contacts"""
+    return Response(_stream_contacts(contacts), status=status, mimetype='application/json')
+
+
+def _wants_lean_response() -> bool:
+    """Check whether the client asked for an acknowledgement-only response"""
+    return (request.args.get('lean') == 'true'
+            or request.headers.get('Prefer') == 'return=minimal')
+
+
+def _wants_partial_success() -> bool:
+    """Check whether the client accepts per-item results for a bulk request"""
+    return request.args.get('partial') == 'true'
+
+
+def _multi_status(succeeded: List[Tuple[int, Contact]], errors: List[Tuple[int, str]],
+                  success_status: int, lean: bool) -> Response:
+    """Build a 207 Multi-Status response with one result per input item, in input order"""
+    results: List[Dict[str, Any]] = [
+        {"index": index, "status": success_status, "id": contact.id} if lean
+        else {"index": index, "status": success_status, "contact": contact}
+        for index, contact in succeeded
+    ]
+    results.extend({"index": index, "status": 400, "error": error} for index, error in errors)
+    results.sort(key=lambda result: result["index"])
+    return _json_response(results, 207)
+
 
 class ContactController:
     """
@@ -36,7 +95,10 @@ class ContactController:
         Create one or more contacts.
         
         Expected request body: List of contact objects
-        Returns: List of created contacts with generated IDs
+        Returns: List of created contacts with generated IDs, or
+                 {"created": N, "ids": [...]} when ?lean=true or
+                 "Prefer: return=minimal" is sent. With ?partial=true valid
+                 items are created and a 207 lists per-item results.
         """
         try:
             # Validate request data
@@ -51,20 +113,28 @@ class ContactController:
             if not contact_data_list:
                 return jsonify({"error": "Request body cannot be empty"}), 400
             
+            # Create valid contacts and report invalid ones per item
+            if _wants_partial_success():
+                created, errors = self.contact_service.create_contacts_partial(contact_data_list)
+                logger.info("Created %d contacts, rejected %d", len(created), len(errors))
+                return _multi_status(created, errors, 201, _wants_lean_response())
+            
             # Create contacts
             created_contacts = self.contact_service.create_contacts(contact_data_list)
             
-            # Convert to response format
-            response_data = [contact.to_dict() for contact in created_contacts]
-            
-            logger.info(f"Created {len(created_contacts)} contacts")
-            return jsonify(response_data), 201
+            logger.info("Created %d contacts", len(created_contacts))
+            if _wants_lean_response():
+                return _json_response({
+                    "created": len(created_contacts),
+                    "ids": [contact.id for contact in created_contacts]
+                }, 201)
+            return _contacts_response(created_contacts, 201)
             
         except ValueError as e:
-            logger.error(f"Validation error in create_contacts: {str(e)}")
+            logger.error("Validation error in create_contacts: %s", e)
             return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logger.error(f"Unexpected error in create_contacts: {str(e)}")
+            logger.error("Unexpected error in create_contacts: %s", e)
             return jsonify({"error": "Internal server error"}), 500
     
     def update_contacts(self):
@@ -73,7 +143,10 @@ class ContactController:
         Update one or more contacts.
         
         Expected request body: List of objects with id and fields to update
-        Returns: List of updated contacts
+        Returns: List of updated contacts, or {"updated": N, "ids": [...]}
+                 when ?lean=true or "Prefer: return=minimal" is sent. With
+                 ?partial=true valid items are applied and a 207 lists
+                 per-item results.
         """
         try:
             # Validate request data
@@ -88,20 +161,28 @@ class ContactController:
             if not update_data_list:
                 return jsonify({"error": "Request body cannot be empty"}), 400
             
+            # Apply valid updates and report invalid ones per item
+            if _wants_partial_success():
+                updated, errors = self.contact_service.update_contacts_partial(update_data_list)
+                logger.info("Updated %d contacts, rejected %d", len(updated), len(errors))
+                return _multi_status(updated, errors, 200, _wants_lean_response())
+            
             # Update contacts
             updated_contacts = self.contact_service.update_contacts(update_data_list)
             
-            # Convert to response format
-            response_data = [contact.to_dict() for contact in updated_contacts]
-            
-            logger.info(f"Updated {len(updated_contacts)} contacts")
-            return jsonify(response_data), 200
+            logger.info("Updated %d contacts", len(updated_contacts))
+            if _wants_lean_response():
+                return _json_response({
+                    "updated": len(updated_contacts),
+                    "ids": [contact.id for contact in updated_contacts]
+                }, 200)
+            return _contacts_response(updated_contacts, 200)
             
         except ValueError as e:
-            logger.error(f"Validation error in update_contacts: {str(e)}")
+            logger.error("Validation error in update_contacts: %s", e)
             return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logger.error(f"Unexpected error in update_contacts: {str(e)}")
+            logger.error("Unexpected error in update_contacts: %s", e)
             return jsonify({"error": "Internal server error"}), 500
     
     def delete_contacts(self):
@@ -130,14 +211,20 @@ class ContactController:
                 if not isinstance(contact_id, str):
                     return jsonify({"error": "All contact IDs must be strings"}), 400
             
+            # Parse IDs into UUIDs
+            try:
+                parsed_ids = [uuid.UUID(contact_id) for contact_id in contact_ids]
+            except ValueError:
+                return jsonify({"error": "All contact IDs must be valid UUIDs"}), 400
+            
             # Delete contacts
-            deleted_count = self.contact_service.delete_contacts(contact_ids)
+            deleted_count = self.contact_service.delete_contacts(parsed_ids)
             
-            logger.info(f"Deleted {deleted_count} contacts")
+            logger.info("Deleted %d contacts", deleted_count)
             return jsonify({"deleted": deleted_count}), 200
             
         except Exception as e:
-            logger.error(f"Unexpected error in delete_contacts: {str(e)}")
+            logger.error("Unexpected error in delete_contacts: %s", e)
             return jsonify({"error": "Internal server error"}), 500
     
     def search_contacts(self):
@@ -168,12 +255,10 @@ class ContactController:
             # Search contacts
             matching_contacts = self.contact_service.search_contacts(query)
             
-            # Convert to response format
-            response_data = [contact.to_dict() for contact in matching_contacts]
-            
-            logger.info(f"Search for '{query}' returned {len(matching_contacts)} contacts")
-            return jsonify(response_data), 200
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Search for '%s' returned %d contacts", query, len(matching_contacts))
+            return _contacts_response(matching_contacts, 200)
             
         except Exception as e:
-            logger.error(f"Unexpected error in search_contacts: {str(e)}")
+            logger.error("Unexpected error in search_contacts: %s", e)
             return jsonify({"error": "Internal server error"}), 500 
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for running the Address Book API in production.
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+"""
+import os
+
+# Application factory
+wsgi_app = 'app:create_app()'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Contacts live in process memory, so every worker process holds its own
+# independent store. Keep a single worker by default and scale with threads;
+# the store's striped locks let threaded requests run concurrently.
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Idle keep-alive connections are parked on the gthread worker's poller
+# rather than holding a thread; threads are only busy while a request runs.
+# Put a buffering reverse proxy in front so slow uploads are read there.
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Log to stdout/stderr like the development server
+accesslog = '-'
+errorlog = '-'
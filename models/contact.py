@@ -1,33 +1,39 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 import uuid
 
 
-@dataclass
+@dataclass(slots=True)
 class Contact:
     """
     Contact model representing an address book entry.
     
     Attributes:
-        id: Unique identifier (UUID string)
+        id: Unique identifier (UUID, stringified only for JSON)
         name: Contact's full name
         phone: Contact's phone number
         email: Contact's email address
+        name_lower: Lowercased name, cached for indexing and search
+        email_lower: Lowercased email, cached for indexing and search
     """
     name: str
     phone: str
     email: str
-    id: Optional[str] = None
+    id: Optional[uuid.UUID] = None
+    name_lower: str = field(init=False, repr=False, compare=False)
+    email_lower: str = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
-        """Generate UUID if not provided"""
+        """Generate UUID if not provided and cache lowercased fields"""
         if self.id is None:
-            self.id = str(uuid.uuid4())
+            self.id = uuid.uuid4()
+        self.name_lower = self.name.lower()
+        self.email_lower = self.email.lower()
     
     def to_dict(self) -> dict:
         """Convert contact to dictionary for JSON serialization"""
         return {
-            "id": self.id,
+            "id": str(self.id),
             "name": self.name,
             "phone": self.phone,
             "email": self.email
@@ -35,6 +41,12 @@ class Contact:
     
     def update_fields(self, **kwargs) -> None:
         """Update contact fields with provided values"""
-        for field, value in kwargs.items():
-            if hasattr(self, field) and field != 'id':
-                setattr(self, field, value) 
\ No newline at end of file
+        for name, value in kwargs.items():
+            if hasattr(self, name) and name not in ('id', 'name_lower', 'email_lower'):
+                setattr(self, name, value)
+        
+        # Refresh cached lowercased values
+        if 'name' in kwargs:
+            self.name_lower = self.name.lower()
+        if 'email' in kwargs:
+            self.email_lower = self.email.lower() 
\ No newline at end of file
@@ -1,8 +1,20 @@
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import re
+import threading
+import uuid
 from models.contact import Contact
 from storage.memory_store import MemoryStore
 
 
+# Precompiled validators, matched in a single pass without intermediate strings
+_EMAIL_RE = re.compile(r'@[^@]*\.[^@]*\Z')                # domain after the last '@' has a '.'
+_PHONE_RE = re.compile(r'[\- ()]*(?:\d[\- ()]*){10,}')    # 10+ digits with common separators
+
+_SEARCH_CACHE_SIZE = 1024          # Max cached (store version, query) results
+_SEARCH_CACHE_MAX_RESULTS = 1000   # Larger results (short, broad queries) are not cached
+
+
 class ContactService:
     """
     Business logic layer for contact operations.
@@ -11,10 +23,17 @@ class ContactService:
     
     def __init__(self, store: MemoryStore):
         self._store = store
+        
+        # LRU cache of search results, keyed by (store version, normalized query).
+        # Any write changes the store version, so stale entries are never hit
+        # and simply age out.
+        self._search_cache: "OrderedDict[Tuple[int, str], List[uuid.UUID]]" = OrderedDict()
+        self._search_cache_lock = threading.Lock()
     
     def create_contacts(self, contact_data_list: List[Dict[str, Any]]) -> List[Contact]:
         """
         Create multiple contacts from input data.
+        All items are validated before any contact is stored.
         
         Args:
             contact_data_list: List of dictionaries containing contact data
@@ -25,28 +44,31 @@ class ContactService:
         Raises:
             ValueError: If contact data is invalid
         """
-        created_contacts = []
+        contacts, errors = self._build_contacts(contact_data_list)
+        if errors:
+            raise ValueError(errors[0][1])
         
-        for contact_data in contact_data_list:
-            # Validate required fields
-            self._validate_contact_data(contact_data)
-            
-            # Create contact object
-            contact = Contact(
-                name=contact_data['name'],
-                phone=contact_data['phone'],
-                email=contact_data['email']
-            )
-            
-            # Store contact
-            created_contact = self._store.create_contact(contact)
-            created_contacts.append(created_contact)
+        return self._store.create_contacts([contact for _, contact in contacts])
+    
+    def create_contacts_partial(self, contact_data_list: List[Dict[str, Any]]
+                                ) -> Tuple[List[Tuple[int, Contact]], List[Tuple[int, str]]]:
+        """
+        Create the valid contacts from input data and report the invalid ones.
         
-        return created_contacts
+        Args:
+            contact_data_list: List of dictionaries containing contact data
+            
+        Returns:
+            Tuple of (index, created Contact) pairs and (index, error message) pairs
+        """
+        contacts, errors = self._build_contacts(contact_data_list)
+        self._store.create_contacts([contact for _, contact in contacts])
+        return contacts, errors
     
     def update_contacts(self, update_data_list: List[Dict[str, Any]]) -> List[Contact]:
         """
         Update multiple contacts with new data.
+        All items are validated before any contact is updated.
         
         Args:
             update_data_list: List of dictionaries containing id and fields to update
@@ -57,35 +79,37 @@ class ContactService:
         Raises:
             ValueError: If contact ID not found or update data is invalid
         """
-        updated_contacts = []
+        updates, errors = self._build_updates(update_data_list)
+        if errors:
+            raise ValueError(errors[0][1])
         
-        for update_data in update_data_list:
-            # Validate ID is present
-            if 'id' not in update_data:
-                raise ValueError("Contact ID is required for update")
-            
-            contact_id = update_data['id']
-            
-            # Get current contact
-            current_contact = self._store.get_contact(contact_id)
-            if not current_contact:
-                raise ValueError(f"Contact with ID {contact_id} not found")
-            
-            # Extract update fields (exclude id)
-            update_fields = {k: v for k, v in update_data.items() if k != 'id'}
-            
-            # Validate update fields
-            if update_fields:
-                self._validate_update_fields(update_fields)
+        updated = self._store.update_contacts([update for _, update in updates])
+        return [contact for contact in updated if contact]
+    
+    def update_contacts_partial(self, update_data_list: List[Dict[str, Any]]
+                                ) -> Tuple[List[Tuple[int, Contact]], List[Tuple[int, str]]]:
+        """
+        Apply the valid updates from input data and report the invalid ones.
+        
+        Args:
+            update_data_list: List of dictionaries containing id and fields to update
             
-            # Update contact
-            updated_contact = self._store.update_contact(contact_id, **update_fields)
-            if updated_contact:
-                updated_contacts.append(updated_contact)
+        Returns:
+            Tuple of (index, updated Contact) pairs and (index, error message) pairs
+        """
+        updates, errors = self._build_updates(update_data_list)
+        updated = self._store.update_contacts([update for _, update in updates])
         
-        return updated_contacts
+        updated_contacts = []
+        for (index, (contact_id, _)), contact in zip(updates, updated):
+            if contact:
+                updated_contacts.append((index, contact))
+            else:
+                # Deleted between validation and update
+                errors.append((index, f"Contact with ID {contact_id} not found"))
+        return updated_contacts, errors
     
-    def delete_contacts(self, contact_ids: List[str]) -> int:
+    def delete_contacts(self, contact_ids: List[uuid.UUID]) -> int:
         """
         Delete multiple contacts by IDs.
         
@@ -95,13 +119,7 @@ class ContactService:
         Returns:
             Number of contacts successfully deleted
         """
-        deleted_count = 0
-        
-        for contact_id in contact_ids:
-            if self._store.delete_contact(contact_id):
-                deleted_count += 1
-        
-        return deleted_count
+        return self._store.delete_contacts(contact_ids)
     
     def search_contacts(self, query: str) -> List[Contact]:
         """
@@ -116,9 +134,30 @@ class ContactService:
         if not query or not query.strip():
             return []
         
-        return self._store.search_contacts(query)
+        # Read the version before searching, so a concurrent write can only
+        # make this entry unreachable, never stale
+        key = (self._store.version, query.lower().strip())
+        
+        with self._search_cache_lock:
+            contact_ids = self._search_cache.get(key)
+            if contact_ids is not None:
+                self._search_cache.move_to_end(key)
+        
+        if contact_ids is not None:
+            return [contact for contact in map(self._store.get_contact, contact_ids) if contact]
+        
+        matching_contacts = self._store.search_contacts(query)
+        if len(matching_contacts) > _SEARCH_CACHE_MAX_RESULTS:
+            return matching_contacts
+        
+        with self._search_cache_lock:
+            self._search_cache[key] = [contact.id for contact in matching_contacts]
+            if len(self._search_cache) > _SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        
+        return matching_contacts
     
-    def get_contact(self, contact_id: str) -> Optional[Contact]:
+    def get_contact(self, contact_id: uuid.UUID) -> Optional[Contact]:
         """Get a single contact by ID"""
         return self._store.get_contact(contact_id)
     
@@ -126,6 +165,74 @@ class ContactService:
         """Get all contacts"""
         return self._store.get_all_contacts()
     
+    def _build_contacts(self, contact_data_list: List[Dict[str, Any]]
+                        ) -> Tuple[List[Tuple[int, Contact]], List[Tuple[int, str]]]:
+        """Validate input data in one pass, collecting contacts and errors by index"""
+        contacts = []
+        errors = []
+        
+        for index, contact_data in enumerate(contact_data_list):
+            try:
+                self._validate_item(contact_data)
+                self._validate_contact_data(contact_data)
+            except ValueError as e:
+                errors.append((index, str(e)))
+                continue
+            
+            contacts.append((index, Contact(
+                name=contact_data['name'],
+                phone=contact_data['phone'],
+                email=contact_data['email']
+            )))
+        
+        return contacts, errors
+    
+    def _build_updates(self, update_data_list: List[Dict[str, Any]]
+                       ) -> Tuple[List[Tuple[int, Tuple[uuid.UUID, Dict[str, Any]]]], List[Tuple[int, str]]]:
+        """Validate update data in one pass, collecting updates and errors by index"""
+        updates = []
+        errors = []
+        
+        for index, update_data in enumerate(update_data_list):
+            try:
+                updates.append((index, self._validate_update_data(update_data)))
+            except ValueError as e:
+                errors.append((index, str(e)))
+        
+        return updates, errors
+    
+    def _validate_update_data(self, update_data: Dict[str, Any]) -> Tuple[uuid.UUID, Dict[str, Any]]:
+        """Validate a single update item and return its parsed ID and fields"""
+        self._validate_item(update_data)
+        
+        # Validate ID is present
+        if 'id' not in update_data:
+            raise ValueError("Contact ID is required for update")
+        
+        raw_id = update_data['id']
+        try:
+            contact_id = uuid.UUID(raw_id)
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f"Invalid contact ID: {raw_id}")
+        
+        # Check contact exists
+        if not self._store.get_contact(contact_id):
+            raise ValueError(f"Contact with ID {contact_id} not found")
+        
+        # Extract update fields (exclude id)
+        update_fields = {k: v for k, v in update_data.items() if k != 'id'}
+        
+        # Validate update fields
+        if update_fields:
+            self._validate_update_fields(update_fields)
+        
+        return contact_id, update_fields
+    
+    def _validate_item(self, item: Any) -> None:
+        """Validate that a bulk request item is a JSON object"""
+        if not isinstance(item, dict):
+            raise ValueError("Each item must be an object")
+    
     def _validate_contact_data(self, contact_data: Dict[str, Any]) -> None:
         """Validate contact data for creation"""
         required_fields = ['name', 'phone', 'email']
@@ -162,12 +269,11 @@ class ContactService:
     
     def _validate_email(self, email: str) -> None:
         """Basic email validation"""
-        if '@' not in email or '.' not in email.split('@')[-1]:
+        if not _EMAIL_RE.search(email):
             raise ValueError(f"Invalid email format: {email}")
     
     def _validate_phone(self, phone: str) -> None:
         """Basic phone validation"""
-        # Remove common separators and check if remaining characters are digits
-        clean_phone = phone.replace('-', '').replace(' ', '').replace('(', '').replace(')', '')
-        if not clean_phone.isdigit() or len(clean_phone) < 10:
+        # Only digits and common separators, with at least 10 digits
+        if not _PHONE_RE.fullmatch(phone):
             raise ValueError(f"Invalid phone format: {phone}") 
\ No newline at end of file
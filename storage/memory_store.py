@@ -1,6 +1,50 @@
-from typing import Dict, List, Optional, Set
+from array import array
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from models.contact import Contact
+from pyroaring import BitMap, FrozenBitMap
+import itertools
+import logging
+import os
+import pickle
 import threading
+import time
+import uuid
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+
+_EMPTY: frozenset = frozenset()
+_EMPTY_POSTING = FrozenBitMap()
+_SMALL_POSTING = 64  # Sealed postings below this size are stored as arrays
+_LOCK_STRIPES = 16  # Must be a power of two
+_DELTA_MERGE_THRESHOLD = 1024  # Index writes absorbed by the delta before merging
+
+# State persisted by snapshots (the id allocator is stored separately)
+_SNAPSHOT_FIELDS = (
+    '_contacts', '_id_to_int', '_int_to_id',
+    '_trigram_sealed', '_trigram_delta', '_trigram_removed', '_delta_writes',
+    '_phone_index', '_email_index',
+)
+_PHONE_STRIP = str.maketrans('', '', '-() ')  # Separators ignored for exact phone lookups
+
+
+# Sealed posting: a compact array of 4-byte ids when small, a Roaring
+# bitmap with fast intersections and compressed containers once it grows
+Posting = Union[array, BitMap]
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Return the set of character 3-grams contained in text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _seal_posting(ids: BitMap) -> Posting:
+    """Build the sealed posting representation for a set of internal ids"""
+    if len(ids) < _SMALL_POSTING:
+        return array('I', ids)  # Unsorted: postings are only scanned, never bisected
+    return ids
 
 
 class MemoryStore:
@@ -9,128 +53,501 @@ class MemoryStore:
     
     Uses multiple indexes for efficient searching:
     - Primary index by ID
-    - Search indexes by name, phone, email
+    - Trigram inverted index over name, phone and email for substring search
+    - Exact indexes by phone and email
+    
+    The trigram index is generational: writes go to a small delta, while
+    the bulk of the postings live in a sealed index that only merges
+    modify. Once the delta has absorbed enough writes it is folded into the
+    sealed index, at a cost proportional to the delta rather than to the
+    size of the postings it touches.
+    
+    Writers lock only the stripe owning the contact ID, so operations on
+    unrelated contacts run concurrently. Shared indexes are only mutated
+    through single dict/set/bitmap operations, which are atomic under the
+    GIL (pyroaring never releases it).
+    Searches take no lock and may briefly miss in-flight writes.
+    
+    Internal dicts are keyed by the UUID's 128-bit integer value, which
+    hashes in C rather than through uuid.UUID.__hash__.
     """
     
-    def __init__(self):
-        self._lock = threading.RLock()  # Thread safety for concurrent access
+    def __init__(self, snapshot: Optional[str] = None):
+        """
+        Args:
+            snapshot: Optional snapshot file to restore contacts and indexes
+                      from, if it exists
+        """
+        # Striped locks serializing writes to the same contact
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        
+        # Primary storage: ID.int -> Contact
+        self._contacts: Dict[int, Contact] = {}
         
-        # Primary storage: ID -> Contact
-        self._contacts: Dict[str, Contact] = {}
+        # Compact integer IDs used in index postings
+        self._id_to_int: Dict[int, int] = {}          # contact_id.int -> internal id
+        self._int_to_id: Dict[int, int] = {}          # internal id -> contact_id.int
+        self._next_int = itertools.count()            # Atomic internal id allocator
         
         # Search indexes for O(1) lookups
-        self._name_index: Dict[str, Set[str]] = {}  # name_word -> set of contact_ids
-        self._phone_index: Dict[str, str] = {}      # phone -> contact_id
-        self._email_index: Dict[str, str] = {}      # email -> contact_id
+        self._trigram_sealed: Dict[str, Posting] = {}     # trigram -> internal ids, changed only by merges
+        self._trigram_delta: Dict[str, BitMap] = {}       # trigram -> internal ids written since last merge
+        self._trigram_removed: Dict[str, BitMap] = {}     # trigram -> internal ids to drop from sealed
+        self._delta_writes = 0  # Approximate under concurrent writers; only drives merging
+        self._phone_index: Dict[str, Set[int]] = {}  # phone digits -> contact_id.ints
+        self._email_index: Dict[str, Set[int]] = {}  # email -> contact_id.ints
+        self._exact_index_lock = threading.Lock()    # Serializes exact index writes across stripes
+        
+        # Data version, replaced with a never-before-seen value after every write
+        self._version_counter = itertools.count(1)
+        self._version = 0
+        
+        # Snapshot persistence
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_path: Optional[str] = None
+        self._snapshotter: Optional[threading.Thread] = None
+        self._snapshotter_stop = threading.Event()
+        
+        if snapshot and os.path.exists(snapshot):
+            self._load_snapshot(snapshot)
     
     def create_contact(self, contact: Contact) -> Contact:
         """Create a new contact with O(1) complexity"""
-        with self._lock:
-            self._contacts[contact.id] = contact
-            self._update_indexes(contact)
-            return contact
+        key = contact.id.int
+        with self._lock_for(key):
+            self._insert_contact(key, contact)
+        self._maybe_merge_delta()
+        return contact
+    
+    def create_contacts(self, contacts: List[Contact]) -> List[Contact]:
+        """Create multiple contacts, taking each lock stripe at most once"""
+        keys = [contact.id.int for contact in contacts]
+        for stripe, positions in self._group_by_stripe(keys).items():
+            with self._locks[stripe]:
+                for position in positions:
+                    self._insert_contact(keys[position], contacts[position])
+        self._maybe_merge_delta()
+        return contacts
+    
+    @property
+    def version(self) -> int:
+        """Opaque data version; changes after every completed write"""
+        return self._version
     
-    def get_contact(self, contact_id: str) -> Optional[Contact]:
+    def get_contact(self, contact_id: uuid.UUID) -> Optional[Contact]:
         """Get contact by ID with O(1) complexity"""
-        return self._contacts.get(contact_id)
+        return self._contacts.get(contact_id.int)
     
-    def update_contact(self, contact_id: str, **updates) -> Optional[Contact]:
+    def update_contact(self, contact_id: uuid.UUID, **updates) -> Optional[Contact]:
         """Update contact with O(1) complexity"""
-        with self._lock:
-            contact = self._contacts.get(contact_id)
-            if not contact:
-                return None
-            
-            # Remove old indexes
-            self._remove_from_indexes(contact)
-            
-            # Update contact
-            contact.update_fields(**updates)
-            
-            # Add new indexes
-            self._update_indexes(contact)
-            
-            return contact
+        key = contact_id.int
+        with self._lock_for(key):
+            contact = self._apply_update(key, updates)
+        self._maybe_merge_delta()
+        return contact
     
-    def delete_contact(self, contact_id: str) -> bool:
+    def update_contacts(self, updates: List[Tuple[uuid.UUID, Dict[str, Any]]]) -> List[Optional[Contact]]:
+        """
+        Update multiple contacts, taking each lock stripe at most once.
+        Returns the updated contacts in input order, None for missing IDs.
+        """
+        keys = [contact_id.int for contact_id, _ in updates]
+        updated: List[Optional[Contact]] = [None] * len(updates)
+        for stripe, positions in self._group_by_stripe(keys).items():
+            with self._locks[stripe]:
+                for position in positions:
+                    updated[position] = self._apply_update(keys[position], updates[position][1])
+        self._maybe_merge_delta()
+        return updated
+    
+    def delete_contact(self, contact_id: uuid.UUID) -> bool:
         """Delete contact with O(1) complexity"""
-        with self._lock:
-            contact = self._contacts.get(contact_id)
-            if not contact:
-                return False
-            
-            # Remove from all indexes
-            self._remove_from_indexes(contact)
-            
-            # Remove from primary storage
-            del self._contacts[contact_id]
-            return True
+        key = contact_id.int
+        with self._lock_for(key):
+            deleted = self._pop_contact(key)
+        self._maybe_merge_delta()
+        return deleted
+    
+    def delete_contacts(self, contact_ids: List[uuid.UUID]) -> int:
+        """
+        Delete multiple contacts, taking each lock stripe at most once.
+        Returns the number of contacts actually deleted.
+        """
+        keys = [contact_id.int for contact_id in contact_ids]
+        deleted_count = 0
+        for stripe, positions in self._group_by_stripe(keys).items():
+            with self._locks[stripe]:
+                for position in positions:
+                    if self._pop_contact(keys[position]):
+                        deleted_count += 1
+        self._maybe_merge_delta()
+        return deleted_count
     
     def search_contacts(self, query: str) -> List[Contact]:
         """
         Search contacts by query string.
         Searches in name, phone, and email fields.
         Returns list of matching contacts.
+        
+        Search is tiered. A query that is exactly a stored email address, or
+        whose digits are exactly a stored phone number, matches every contact
+        owning that email or phone number. Those owners are returned without
+        verification when the query's trigram candidates are all owners, so
+        no longer email or phone can contain it; otherwise the substring
+        matches are added. Any other query is a substring search.
+        
+        Candidates are found by intersecting the trigram postings of the
+        query, then verified with an exact substring check. Queries shorter
+        than three characters have no trigrams and are verified against
+        every contact.
+        
+        Every write reindexes all trigrams of a contact into the delta, so a
+        live contact's current trigrams are either all in the delta or all
+        in the sealed index. Intersecting each generation separately and
+        taking the union therefore finds every match; stale sealed entries
+        are dropped by verification.
         """
         query_lower = query.lower().strip()
         if not query_lower:
             return []
         
-        matching_ids: Set[str] = set()
+        exact_matches = self._exact_matches(query_lower)
         
-        with self._lock:
-            # Search in name index (word-based)
-            for word, contact_ids in self._name_index.items():
-                if query_lower in word.lower():
-                    matching_ids.update(contact_ids)
-            
-            # Search in phone index
-            for phone, contact_id in self._phone_index.items():
-                if query_lower in phone:
-                    matching_ids.add(contact_id)
+        # Lock-free read: only single C-level dict/bitmap operations touch the
+        # shared structures, everything iterated below is a private copy
+        contacts = self._contacts
+        trigram_delta = self._trigram_delta    # Read before sealed, see _merge_delta
+        trigram_sealed = self._trigram_sealed
+        
+        query_trigrams = _trigrams(query_lower)
+        if query_trigrams:
+            candidates = (self._intersect(trigram_delta, query_trigrams)
+                          | self._intersect(trigram_sealed, query_trigrams))
             
-            # Search in email index
-            for email, contact_id in self._email_index.items():
-                if query_lower in email.lower():
-                    matching_ids.add(contact_id)
+            # Exact email / phone owners skip verification when no other
+            # contact can contain the query
+            if exact_matches:
+                id_to_int = self._id_to_int
+                owners = {id_to_int.get(contact.id.int) for contact in exact_matches}
+                if owners.issuperset(candidates):
+                    return exact_matches
             
-            # Return matching contacts
-            return [self._contacts[contact_id] for contact_id in matching_ids 
-                   if contact_id in self._contacts]
+            int_to_id = self._int_to_id
+            candidate_contacts = [contacts.get(int_to_id.get(idx)) for idx in candidates]
+        else:
+            candidate_contacts = list(contacts.values())
+        
+        # Verify candidates, since trigrams may come from different fields
+        matching_contacts = []
+        for contact in candidate_contacts:
+            if contact and self._matches(contact, query_lower):
+                matching_contacts.append(contact)
+        
+        # Exact owners come first; a formatted phone query may match them
+        # only by its digits
+        if exact_matches:
+            exact_keys = {contact.id.int for contact in exact_matches}
+            matching_contacts = exact_matches + [contact for contact in matching_contacts
+                                                 if contact.id.int not in exact_keys]
+        return matching_contacts
     
     def get_all_contacts(self) -> List[Contact]:
         """Get all contacts"""
         return list(self._contacts.values())
     
+    def snapshot(self, path: str) -> None:
+        """
+        Persist contacts and indexes to path as a zstd-compressed pickle.
+        Writers are blocked only while the state is pickled; the file is
+        written to path.tmp, synced to disk and atomically renamed over path.
+        """
+        with self._snapshot_lock:
+            with self._all_stripes():
+                state = {name: getattr(self, name) for name in _SNAPSHOT_FIELDS}
+                state['next_int'] = next(self._next_int)
+                data = pickle.dumps(state, protocol=5)
+            
+            compressed = zstandard.ZstdCompressor().compress(data)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+                # Sync before the rename, or a crash could leave path truncated
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+    
+    def start_snapshotter(self, path: str, interval: float = 60.0, mutations: int = 1000) -> None:
+        """
+        Snapshot to path from a background thread once the store has changed
+        and either interval seconds or roughly mutations writes have passed
+        since the last snapshot.
+        """
+        def run() -> None:
+            last_version, last_time = self._version, time.monotonic()
+            while not self._snapshotter_stop.wait(1.0):
+                version = self._version
+                if version == last_version:
+                    continue
+                if version - last_version >= mutations or time.monotonic() - last_time >= interval:
+                    # Keep the thread alive through any failure, the next
+                    # snapshot may well succeed
+                    try:
+                        self.snapshot(path)
+                    except Exception:
+                        logger.exception("Snapshot to %s failed", path)
+                    last_version, last_time = version, time.monotonic()
+        
+        self._snapshot_path = path
+        self._snapshotter_stop.clear()
+        self._snapshotter = threading.Thread(target=run, name='memory-store-snapshotter', daemon=True)
+        self._snapshotter.start()
+    
+    def stop_snapshotter(self) -> None:
+        """Stop the background snapshotter and write a final snapshot"""
+        if not self._snapshotter:
+            return
+        self._snapshotter_stop.set()
+        self._snapshotter.join()
+        self._snapshotter = None
+        self.snapshot(self._snapshot_path)
+    
+    def _load_snapshot(self, path: str) -> None:
+        """
+        Restore contacts and indexes from a snapshot file.
+        An unreadable snapshot is logged and moved to path.corrupt, leaving
+        the store empty, so a bad file cannot stop the service from starting.
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = zstandard.ZstdDecompressor().decompress(f.read())
+            state = pickle.loads(data)
+            values = [state[name] for name in _SNAPSHOT_FIELDS]
+            next_int = state['next_int']
+        except Exception:
+            logger.exception("Could not restore snapshot %s, starting empty", path)
+            # Keep the file for inspection instead of overwriting it with the empty store
+            try:
+                os.replace(path, f"{path}.corrupt")
+            except OSError as e:
+                logger.error("Could not move aside snapshot %s: %s", path, e)
+            return
+        
+        for name, value in zip(_SNAPSHOT_FIELDS, values):
+            setattr(self, name, value)
+        self._next_int = itertools.count(next_int)
+        logger.info("Restored %d contacts from snapshot %s", len(self._contacts), path)
+    
+    @contextmanager
+    def _all_stripes(self) -> Iterator[None]:
+        """
+        Hold every stripe lock, blocking all writers. Stripes are always
+        acquired in the same order. Must not be used while holding a stripe.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+    
+    def _lock_for(self, key: int) -> threading.Lock:
+        """Return the lock stripe guarding a contact key"""
+        return self._locks[hash(key) & (_LOCK_STRIPES - 1)]
+    
+    @staticmethod
+    def _group_by_stripe(keys: List[int]) -> Dict[int, List[int]]:
+        """Group positions of contact keys by the lock stripe guarding them"""
+        groups: Dict[int, List[int]] = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(hash(key) & (_LOCK_STRIPES - 1), []).append(position)
+        return groups
+    
+    def _insert_contact(self, key: int, contact: Contact) -> None:
+        """Store and index a contact. Caller must hold the key's stripe lock"""
+        if key not in self._id_to_int:
+            idx = next(self._next_int)
+            self._int_to_id[idx] = key
+            self._id_to_int[key] = idx
+        self._contacts[key] = contact
+        self._update_indexes(contact)
+        self._bump_version()
+    
+    def _pop_contact(self, key: int) -> bool:
+        """Unindex and remove a contact. Caller must hold the key's stripe lock"""
+        contact = self._contacts.pop(key, None)
+        if not contact:
+            return False
+        
+        # Remove from all indexes and release the internal id
+        self._remove_from_indexes(contact)
+        del self._int_to_id[self._id_to_int.pop(key)]
+        self._bump_version()
+        return True
+    
+    def _apply_update(self, key: int, updates: Dict[str, Any]) -> Optional[Contact]:
+        """Update and reindex a contact. Caller must hold the key's stripe lock"""
+        contact = self._contacts.get(key)
+        if not contact:
+            return None
+        
+        # Remove old indexes
+        self._remove_from_indexes(contact)
+        
+        # Update contact
+        contact.update_fields(**updates)
+        
+        # Add new indexes
+        self._update_indexes(contact)
+        self._bump_version()
+        
+        return contact
+    
+    def _bump_version(self) -> None:
+        """
+        Publish a new data version after a write.
+        Values come from an atomic counter, so concurrent writers on other
+        stripes never republish a version a reader has already seen.
+        """
+        self._version = next(self._version_counter)
+    
+    def _exact_matches(self, query_lower: str) -> List[Contact]:
+        """Look up the contacts whose email or phone number is exactly the query"""
+        contacts = self._contacts
+        if '@' in query_lower:
+            # tuple() copies the owners in one C call, safe against concurrent writers
+            owners = tuple(self._email_index.get(query_lower, _EMPTY))
+            # Re-check, the index may be briefly stale for lock-free readers
+            return [contact for contact in map(contacts.get, owners)
+                    if contact and contact.email_lower == query_lower]
+        
+        digits = query_lower.translate(_PHONE_STRIP)
+        if len(digits) >= 10 and digits.isdigit():
+            owners = tuple(self._phone_index.get(digits, _EMPTY))
+            return [contact for contact in map(contacts.get, owners)
+                    if contact and contact.phone.translate(_PHONE_STRIP) == digits]
+        return []
+    
+    def _maybe_merge_delta(self) -> None:
+        """Merge the delta into the sealed index once it has absorbed enough writes"""
+        if self._delta_writes < _DELTA_MERGE_THRESHOLD:
+            return
+        
+        with self._all_stripes():
+            if self._delta_writes >= _DELTA_MERGE_THRESHOLD:
+                self._merge_delta()
+    
+    def _merge_delta(self) -> None:
+        """Fold the delta into the sealed index. Caller must hold all stripe locks"""
+        sealed = self._trigram_sealed
+        delta = self._trigram_delta
+        removed = self._trigram_removed
+        
+        for trigram in delta.keys() | removed.keys():
+            added = delta.get(trigram, _EMPTY_POSTING)
+            dropped = removed.get(trigram, _EMPTY_POSTING) - added  # Re-added ids stay
+            posting = sealed.get(trigram)
+            
+            if isinstance(posting, BitMap):
+                # Large postings are updated in place, each step a single
+                # C-level bitmap operation, so the cost follows the delta
+                posting |= added
+                posting -= dropped
+                if not posting:
+                    del sealed[trigram]
+                continue
+            
+            # Small arrays are rebuilt and replaced
+            ids = BitMap(posting) if posting else BitMap()
+            ids |= added
+            ids -= dropped
+            if ids:
+                sealed[trigram] = _seal_posting(ids)
+            else:
+                sealed.pop(trigram, None)
+        
+        # Clear the delta last: until then every contact in it is still
+        # found there, whatever state a concurrent search sees the sealed
+        # postings in
+        self._trigram_delta = {}
+        self._trigram_removed = {}
+        self._delta_writes = 0
+    
+    @staticmethod
+    def _intersect(index: Dict[str, Iterable[int]], trigrams: Set[str]) -> BitMap:
+        """Intersect the postings (bitmaps or arrays) of trigrams in one index generation"""
+        # Intersect smallest postings first to keep the working set small
+        postings = sorted((index.get(trigram, _EMPTY_POSTING) for trigram in trigrams), key=len)
+        result = BitMap(postings[0])  # Private copy, safe to narrow in place
+        for posting in postings[1:]:
+            if not result:
+                break
+            # Small arrays are converted, which is cheap as they are small
+            result &= posting if not isinstance(posting, array) else BitMap(posting)
+        return result
+    
+    @staticmethod
+    def _matches(contact: Contact, query_lower: str) -> bool:
+        """Check whether a lowercased query is a substring of any searchable field"""
+        return (query_lower in contact.name_lower
+                or query_lower in contact.phone
+                or query_lower in contact.email_lower)
+    
+    @staticmethod
+    def _contact_trigrams(contact: Contact) -> Set[str]:
+        """Collect the trigrams of all searchable fields of a contact"""
+        return (_trigrams(contact.name_lower)
+                | _trigrams(contact.phone)
+                | _trigrams(contact.email_lower))
+    
     def _update_indexes(self, contact: Contact) -> None:
         """Update all search indexes for a contact"""
-        # Name index (split by words for partial matching)
-        name_words = contact.name.lower().split()
-        for word in name_words:
-            if word not in self._name_index:
-                self._name_index[word] = set()
-            self._name_index[word].add(contact.id)
-        
-        # Phone index
-        self._phone_index[contact.phone] = contact.id
+        # Trigram index (substring matching across all fields), delta only
+        idx = self._id_to_int[contact.id.int]
+        delta = self._trigram_delta
+        for trigram in self._contact_trigrams(contact):
+            posting = delta.get(trigram)
+            if posting is None:
+                posting = delta.setdefault(trigram, BitMap())
+            posting.add(idx)
+        self._delta_writes += 1
         
-        # Email index
-        self._email_index[contact.email.lower()] = contact.id
+        # Phone and email indexes, shared by every contact with the same value
+        key = contact.id.int
+        with self._exact_index_lock:
+            self._phone_index.setdefault(contact.phone.translate(_PHONE_STRIP), set()).add(key)
+            self._email_index.setdefault(contact.email_lower, set()).add(key)
     
     def _remove_from_indexes(self, contact: Contact) -> None:
         """Remove contact from all search indexes"""
-        # Remove from name index
-        name_words = contact.name.lower().split()
-        for word in name_words:
-            if word in self._name_index:
-                self._name_index[word].discard(contact.id)
-                if not self._name_index[word]:
-                    del self._name_index[word]
-        
-        # Remove from phone index
-        if contact.phone in self._phone_index:
-            del self._phone_index[contact.phone]
-        
-        # Remove from email index
-        if contact.email.lower() in self._email_index:
-            del self._email_index[contact.email.lower()] 
\ No newline at end of file
+        # Remove from the trigram delta and record the removal for the next
+        # merge; only merges modify the sealed index. Empty delta postings are
+        # kept until then, as pruning would race with concurrent adds
+        idx = self._id_to_int[contact.id.int]
+        delta = self._trigram_delta
+        removed = self._trigram_removed
+        for trigram in self._contact_trigrams(contact):
+            posting = delta.get(trigram)
+            if posting is not None:
+                posting.discard(idx)
+            posting = removed.get(trigram)
+            if posting is None:
+                posting = removed.setdefault(trigram, BitMap())
+            posting.add(idx)
+        self._delta_writes += 1
+        
+        # Remove only this contact from the phone and email indexes
+        key = contact.id.int
+        with self._exact_index_lock:
+            self._discard_owner(self._phone_index, contact.phone.translate(_PHONE_STRIP), key)
+            self._discard_owner(self._email_index, contact.email_lower, key)
+    
+    @staticmethod
+    def _discard_owner(index: Dict[str, Set[int]], value: str, key: int) -> None:
+        """Remove a contact key from an exact index entry, dropping the entry once empty"""
+        owners = index.get(value)
+        if owners is None:
+            return
+        owners.discard(key)
+        if not owners:
+            del index[value]
\ No newline at end of file
@@ -3,9 +3,14 @@
 Simple test script to verify the address book application works correctly.
 """
 
+import os
 import sys
 import json
+import random
+import tempfile
 from app import create_app
+from models.contact import Contact
+from storage.memory_store import MemoryStore, _DELTA_MERGE_THRESHOLD
 
 def test_address_book():
     """Test the address book functionality"""
@@ -135,6 +140,87 @@ def test_address_book():
                 print(f"   ✗ Search after deletion failed: {response.get_json()}")
                 return False
         
+            # Test 7: Lean create response
+            print("\n7. Testing lean create response...")
+            create_data = [
+                {
+                    "name": "Carol White",
+                    "phone": "3456789012",
+                    "email": "carol@example.com"
+                }
+            ]
+            
+            response = client.post('/create?lean=true', json=create_data)
+            print(f"   Status: {response.status_code}")
+            
+            if response.status_code == 201:
+                result = response.get_json()
+                print(f"   Response: {json.dumps(result, indent=2)}")
+                if result['created'] == 1 and len(result['ids']) == 1:
+                    print("   ✓ Lean create passed!")
+                else:
+                    print("   ✗ Lean create returned unexpected body!")
+                    return False
+            else:
+                print(f"   ✗ Lean create failed: {response.get_json()}")
+                return False
+            
+            # Test 8: Partial success create
+            print("\n8. Testing partial success create...")
+            create_data = [
+                {
+                    "name": "Dave Brown",
+                    "phone": "4567890123",
+                    "email": "dave@example.com"
+                },
+                {
+                    "name": "Eve Black",
+                    "phone": "123",
+                    "email": "eve@example.com"
+                }
+            ]
+            
+            response = client.post('/create?partial=true', json=create_data)
+            print(f"   Status: {response.status_code}")
+            
+            if response.status_code == 207:
+                results = response.get_json()
+                for result in results:
+                    print(f"   - Item {result['index']}: {result['status']}")
+                if [result['status'] for result in results] == [201, 400]:
+                    print("   ✓ Partial success create passed!")
+                else:
+                    print("   ✗ Partial success create returned unexpected results!")
+                    return False
+            else:
+                print(f"   ✗ Partial success create failed: {response.get_json()}")
+                return False
+
+            # Test 9: Partial success update with malformed items
+            print("\n9. Testing partial success update with malformed items...")
+            update_data = [
+                {"id": "nope"},
+                {"id": alice_id, "name": "Alice Cooper"},
+                5
+            ]
+
+            response = client.put('/update?partial=true', json=update_data)
+            print(f"   Status: {response.status_code}")
+
+            if response.status_code == 207:
+                results = response.get_json()
+                for result in results:
+                    print(f"   - Item {result['index']}: {result['status']} {result.get('error', '')}")
+                if ([result['status'] for result in results] == [400, 200, 400]
+                        and results[2]['error'] == "Each item must be an object"):
+                    print("   ✓ Partial success update passed!")
+                else:
+                    print("   ✗ Partial success update returned unexpected results!")
+                    return False
+            else:
+                print(f"   ✗ Partial success update failed: {response.get_json()}")
+                return False
+
         print("\n" + "=" * 50)
         print("🎉 ALL TESTS PASSED! The address book is working correctly!")
         print("=" * 50)
@@ -147,6 +233,233 @@ def test_address_book():
         return False
 
 
+def _search_names(client, query):
+    """Search through the API and return the sorted names of the matches"""
+    response = client.post('/search', json={"query": query})
+    if response.status_code != 200:
+        raise AssertionError(f"Search for {query!r} failed: {response.get_json()}")
+    return sorted(contact['name'] for contact in response.get_json())
+
+
+def test_search_semantics():
+    """Test substring search across index and scan paths"""
+    print("\n" + "=" * 50)
+    print("TESTING SEARCH SEMANTICS")
+    print("=" * 50)
+
+    try:
+        app = create_app()
+
+        with app.test_client() as client:
+            create_data = [
+                {"name": "Ann Brown", "phone": "1112223333", "email": "ann@example.com"},
+                # Email and phone each contain Ann's as a substring
+                {"name": "Jo Ann", "phone": "11112223333", "email": "joann@example.com"},
+                {"name": "Annabel Lee", "phone": "4445556666", "email": "lee@example.com"},
+                # Name and email each hold half the trigrams of "abcde" but
+                # neither contains it, so only verification can reject it
+                {"name": "Abcd Split", "phone": "7778889999", "email": "bcde@example.com"},
+                # Same phone digits and email as each other, formatted differently
+                {"name": "Fay Shared", "phone": "(123) 456-7890", "email": "Shared@example.com"},
+                {"name": "Gus Shared", "phone": "123-456-7890", "email": "shared@example.com"}
+            ]
+            response = client.post('/create', json=create_data)
+            if response.status_code != 201:
+                print(f"   ✗ Setup failed: {response.get_json()}")
+                return False
+
+            cases = [
+                ("query spanning two words", "ann b", ["Ann Brown"]),
+                ("query under 3 characters", "An", ["Ann Brown", "Annabel Lee", "Jo Ann"]),
+                ("trigrams split across fields", "abcde", []),
+                ("trigrams in one field", "bcde@", ["Abcd Split"]),
+                ("formatted exact phone", "(123) 456-7890", ["Fay Shared", "Gus Shared"]),
+                ("bare exact phone", "1234567890", ["Fay Shared", "Gus Shared"]),
+                ("shared exact email", "SHARED@example.com", ["Fay Shared", "Gus Shared"]),
+                ("exact email inside a longer one", "ann@example.com", ["Ann Brown", "Jo Ann"]),
+                ("exact phone inside a longer one", "1112223333", ["Ann Brown", "Jo Ann"]),
+                ("formatted exact phone next to a longer one", "111-222-3333", ["Ann Brown"]),
+            ]
+            for number, (description, query, expected) in enumerate(cases, 1):
+                print(f"\n{number}. Testing {description} ({query!r})...")
+                names = _search_names(client, query)
+                print(f"   Found: {names}")
+                if names == expected:
+                    print("   ✓ Passed!")
+                else:
+                    print(f"   ✗ Expected {expected}!")
+                    return False
+
+            # Moving one owner off the shared values must not unindex the other
+            print(f"\n{len(cases) + 1}. Testing exact lookups after one owner changes...")
+            fay = next(contact for contact in response.get_json() if contact['name'] == "Fay Shared")
+            update = client.put('/update', json=[
+                {"id": fay['id'], "phone": "9998887777", "email": "fay@example.com"}
+            ])
+            if update.status_code != 200:
+                print(f"   ✗ Update failed: {update.get_json()}")
+                return False
+            for query in ["(123) 456-7890", "shared@example.com"]:
+                names = _search_names(client, query)
+                print(f"   Found for {query!r}: {names}")
+                if names != ["Gus Shared"]:
+                    print("   ✗ Expected ['Gus Shared']!")
+                    return False
+            print("   ✓ Passed!")
+
+            # A cached result must not outlive the next write
+            print(f"\n{len(cases) + 2}. Testing search cache invalidation...")
+            before = _search_names(client, "Brown")
+            create = client.post('/create', json=[
+                {"name": "Hal Brown", "phone": "2223334444", "email": "hal@example.com"}
+            ])
+            if create.status_code != 201:
+                print(f"   ✗ Create failed: {create.get_json()}")
+                return False
+            after = _search_names(client, "Brown")
+            print(f"   Found before: {before}, after: {after}")
+            if before == ["Ann Brown"] and after == ["Ann Brown", "Hal Brown"]:
+                print("   ✓ Passed!")
+            else:
+                print("   ✗ Search served a stale cached result!")
+                return False
+
+        return True
+
+    except Exception as e:
+        print(f"\n✗ Error during testing: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def _brute_force_search(store, query):
+    """Reference search: scan every contact with a plain substring check"""
+    query_lower = query.lower().strip()
+    return sorted(str(contact.id) for contact in store.get_all_contacts()
+                  if query_lower in contact.name_lower
+                  or query_lower in contact.phone
+                  or query_lower in contact.email_lower)
+
+
+def test_delta_merge():
+    """Test the trigram index against a full scan across delta merges"""
+    print("\n" + "=" * 50)
+    print("TESTING TRIGRAM INDEX ACROSS DELTA MERGES")
+    print("=" * 50)
+
+    rng = random.Random(42)
+    words = ["ann", "bob", "carol", "dave", "smith", "jones", "lee", "brown", "annabel"]
+    queries = ["ann", "smith", "an", "bob jones", "lee@", "@mail", "555", "carol", "rown"]
+
+    def random_fields():
+        name = f"{rng.choice(words).title()} {rng.choice(words).title()}"
+        return {
+            "name": name,
+            "phone": f"555{rng.randrange(10 ** 7):07d}",
+            "email": f"{name.split()[0].lower()}{rng.randrange(100)}@{rng.choice(['mail', 'example'])}.com"
+        }
+
+    store = MemoryStore()
+    live = []
+    writes = 0
+    for round_number in range(1, 6):
+        # Each round pushes the delta past the merge threshold
+        while writes < round_number * _DELTA_MERGE_THRESHOLD:
+            operation = rng.random()
+            if operation < 0.5 or not live:
+                contacts = store.create_contacts([Contact(**random_fields()) for _ in range(8)])
+                live.extend(contact.id for contact in contacts)
+            elif operation < 0.8:
+                contact_id = rng.choice(live)
+                field = rng.choice(["name", "phone", "email"])
+                store.update_contact(contact_id, **{field: random_fields()[field]})
+            else:
+                contact_id = live.pop(rng.randrange(len(live)))
+                store.delete_contacts([contact_id])
+            writes += 1
+
+        print(f"\n{round_number}. Comparing searches after {writes} writes "
+              f"({len(live)} live contacts)...")
+        for query in queries:
+            found = sorted(str(contact.id) for contact in store.search_contacts(query))
+            if found != _brute_force_search(store, query):
+                print(f"   ✗ Search for {query!r} disagrees with a full scan!")
+                return False
+        print("   ✓ All searches match a full scan!")
+
+    return True
+
+
+def test_snapshot_restore():
+    """Test that a restored snapshot searches and accepts writes like the original"""
+    print("\n" + "=" * 50)
+    print("TESTING SNAPSHOT RESTORE")
+    print("=" * 50)
+
+    store = MemoryStore()
+    store.create_contacts([
+        Contact(name=f"Person {i}", phone=f"555{i:07d}", email=f"person{i}@example.com")
+        for i in range(2 * _DELTA_MERGE_THRESHOLD)
+    ])
+    store.update_contact(store.search_contacts("person7@example.com")[0].id, name="Renamed Seven")
+    store.delete_contacts([contact.id for contact in store.search_contacts("Person 9")])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "contacts.snapshot")
+        print("\n1. Snapshotting and restoring...")
+        store.snapshot(path)
+        restored = MemoryStore(snapshot=path)
+        if len(restored.get_all_contacts()) != len(store.get_all_contacts()):
+            print("   ✗ Restored store has a different number of contacts!")
+            return False
+        print(f"   ✓ Restored {len(restored.get_all_contacts())} contacts!")
+
+    print("\n2. Comparing searches on the restored store...")
+    for query in ["Person 1", "Renamed", "Person 9", "5550000042", "person12@example.com", "@exa"]:
+        expected = sorted(str(contact.id) for contact in store.search_contacts(query))
+        found = sorted(str(contact.id) for contact in restored.search_contacts(query))
+        if found != expected:
+            print(f"   ✗ Search for {query!r} differs after restore!")
+            return False
+    print("   ✓ All searches match the original store!")
+
+    print("\n3. Creating a contact in the restored store...")
+    created = restored.create_contact(Contact(name="Newcomer", phone="5559999999",
+                                              email="newcomer@example.com"))
+    if ([contact.id for contact in restored.search_contacts("Newcomer")] == [created.id]
+            and [contact.name for contact in restored.search_contacts("person12@example.com")]
+            == ["Person 12"]):
+        print("   ✓ New contact is searchable alongside restored ones!")
+    else:
+        print("   ✗ New contact was not indexed correctly!")
+        return False
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "contacts.snapshot")
+        print("\n4. Restoring from a truncated snapshot...")
+        store.snapshot(path)
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) // 2)
+        damaged = MemoryStore(snapshot=path)
+        damaged.create_contact(Contact(name="Fresh Start", phone="5550001111",
+                                       email="fresh@example.com"))
+        if (len(damaged.get_all_contacts()) == 1
+                and [contact.name for contact in damaged.search_contacts("fresh")] == ["Fresh Start"]
+                and os.path.exists(f"{path}.corrupt")):
+            print("   ✓ Store started empty and kept the damaged file aside!")
+        else:
+            print("   ✗ Damaged snapshot was not handled!")
+            return False
+
+    return True
+
+
 if __name__ == '__main__':
-    success = test_address_book()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    success = all([
+        test_address_book(),
+        test_search_semantics(),
+        test_delta_merge(),
+        test_snapshot_restore(),
+    ])
+    sys.exit(0 if success else 1)
\ No newline at end of file